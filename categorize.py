@@ -5,7 +5,11 @@ Norwegian Company Categorization Tool
 Main script for categorizing companies from CSV files.
 
 USAGE:
-    python categorize.py
+    python categorize.py [input.csv] [--metadata] [--no-excel] [--sequential]
+                         [--workers N] [--no-cache] [--verbose]
+
+    Options not given on the command line are asked for interactively, or use
+    their defaults when input is not a terminal (e.g. scripted runs).
 
 INPUT:
     Place your CSV file in the 'input/' directory.
@@ -19,13 +23,15 @@ OUTPUT:
 
 import sys
 import os
-import glob
+import argparse
+import logging
 from pathlib import Path
 
 # Add src directory to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
 
-from src.processor import process_csv_file
+# Only the lightweight config module is imported up front; the processing
+# pipeline (and requests/urllib3) is imported once a file has been selected
 from src.config import PRODUCT_CATEGORIES, CSV_DELIMITER
 
 
@@ -48,21 +54,73 @@ def display_welcome():
     print("=" * 55)
 
 
-def find_input_files():
-    """Find CSV files in the input directory"""
-    input_dir = Path("input")
+def parse_arguments():
+    """Parse command-line arguments; unset options are prompted for later"""
+    parser = argparse.ArgumentParser(
+        description="Categorize Norwegian companies from a CSV file"
+    )
+    parser.add_argument(
+        "input_file",
+        nargs="?",
+        help="CSV file to process (default: choose from the 'input/' directory)",
+    )
+    parser.add_argument(
+        "--metadata",
+        action="store_true",
+        default=None,
+        help="Include detailed metadata columns",
+    )
+    parser.add_argument(
+        "--no-excel",
+        dest="excel_compatible",
+        action="store_false",
+        default=None,
+        help="Write plain UTF-8 instead of Excel-compatible UTF-8 with BOM",
+    )
+    parser.add_argument(
+        "--sequential",
+        dest="concurrent",
+        action="store_false",
+        default=None,
+        help="Process companies one at a time instead of concurrently",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        choices=range(2, 11),
+        metavar="N",
+        help="Maximum concurrent workers (2-10, default=5)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        help="Ignore BRREG responses cached by earlier runs and fetch fresh data "
+        "(duplicate names within the run are still looked up once)",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Show how each company match was selected (sequential processing)",
+    )
+    return parser.parse_args()
 
-    if not input_dir.exists():
-        print("❌ 'input/' directory not found!")
-        print("   Creating 'input/' directory...")
-        input_dir.mkdir()
-        return []
 
-    csv_files = list(input_dir.glob("*.csv"))
-    return csv_files
+def configure_logging(verbose=False):
+    """Send warnings (and with verbose, company selection details) to the console"""
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    if verbose:
+        # Only this tool's debug output; urllib3's connection logging stays off
+        logging.getLogger("src").setLevel(logging.DEBUG)
+
+
+def find_input_files():
+    """Find CSV files in the input directory"""
+    # ensure_directories() has already created 'input/' if it was missing
+    return list(Path("input").glob("*.csv"))
 
 
-def select_input_file(csv_files):
+def select_input_file(csv_files, interactive=True):
     """Let user select which CSV file to process"""
     if len(csv_files) == 0:
         print("❌ No CSV files found in 'input/' directory!")
@@ -81,6 +139,8 @@ def select_input_file(csv_files):
     if len(csv_files) == 1:
         selected_file = csv_files[0]
         print(f"📄 Found 1 CSV file: {selected_file.name}")
+        if not interactive:
+            return selected_file
         response = input("   Process this file? (y/n): ").lower().strip()
         if response in ["y", "yes", ""]:
             return selected_file
@@ -92,6 +152,10 @@ def select_input_file(csv_files):
     for i, file in enumerate(csv_files, 1):
         print(f"   {i}. {file.name}")
 
+    if not interactive:
+        print("   Pass the file to process on the command line")
+        return None
+
     while True:
         try:
             choice = input(f"\nSelect file (1-{len(csv_files)}): ").strip()
@@ -108,39 +172,59 @@ def select_input_file(csv_files):
             print("Please enter a valid number")
 
 
-def get_processing_options():
-    """Get processing options from user"""
-    print("\n⚙️  Processing Options:")
+def get_processing_options(args, interactive=True):
+    """Get processing options from arguments, asking the user for any not given"""
+    if interactive and None in (
+        args.metadata,
+        args.excel_compatible,
+        args.concurrent,
+        args.workers,
+    ):
+        print("\n⚙️  Processing Options:")
 
     # Include metadata option
-    response = (
-        input("   Include detailed metadata (subsegment, confidence, etc.)? (y/n): ")
-        .lower()
-        .strip()
-    )
-    include_metadata = response in ["y", "yes"]
+    include_metadata = args.metadata
+    if include_metadata is None:
+        include_metadata = False
+        if interactive:
+            response = (
+                input(
+                    "   Include detailed metadata (subsegment, confidence, etc.)? (y/n): "
+                )
+                .lower()
+                .strip()
+            )
+            include_metadata = response in ["y", "yes"]
 
     # Excel compatibility option
-    response = (
-        input("   Optimize for Excel compatibility (UTF-8 with BOM)? (Y/n): ")
-        .lower()
-        .strip()
-    )
-    excel_compatible = response not in ["n", "no"]  # Default to yes
+    excel_compatible = args.excel_compatible
+    if excel_compatible is None:
+        excel_compatible = True  # Default to yes
+        if interactive:
+            response = (
+                input("   Optimize for Excel compatibility (UTF-8 with BOM)? (Y/n): ")
+                .lower()
+                .strip()
+            )
+            excel_compatible = response not in ["n", "no"]
 
     # Concurrent processing option
-    response = (
-        input(
-            "   Use concurrent processing for speed (recommended for large datasets)? (Y/n): "
-        )
-        .lower()
-        .strip()
-    )
-    concurrent = response not in ["n", "no"]  # Default to yes
+    concurrent = args.concurrent
+    if concurrent is None:
+        concurrent = True  # Default to yes
+        if interactive:
+            response = (
+                input(
+                    "   Use concurrent processing for speed (recommended for large datasets)? (Y/n): "
+                )
+                .lower()
+                .strip()
+            )
+            concurrent = response not in ["n", "no"]
 
     # Workers option (only if concurrent is enabled)
-    max_workers = 5  # Default
-    if concurrent:
+    max_workers = args.workers or 5  # Default
+    if concurrent and args.workers is None and interactive:
         response = input("   Maximum concurrent workers (2-10, default=5): ").strip()
         if response.isdigit() and 2 <= int(response) <= 10:
             max_workers = int(response)
@@ -185,25 +269,41 @@ DNB Bank{CSV_DELIMITER}"250,000,000"{CSV_DELIMITER}ignored
 
 def main():
     """Main function"""
+    args = parse_arguments()
+    configure_logging(args.verbose)
+
+    # Only prompt when someone is at the keyboard; scripted runs use defaults
+    interactive = sys.stdin.isatty()
+
     try:
         display_welcome()
         ensure_directories()
 
-        # Find input files
-        csv_files = find_input_files()
+        if args.input_file:
+            # File given on the command line - skip the selection prompt
+            selected_file = Path(args.input_file)
+            if not selected_file.is_file():
+                print(f"❌ Input file not found: {selected_file}")
+                return 1
+        else:
+            # Find input files
+            csv_files = find_input_files()
 
-        # Select file to process
-        selected_file = select_input_file(csv_files)
+            # Select file to process
+            selected_file = select_input_file(csv_files, interactive)
 
         if not selected_file:
             print("\n👋 No file selected. Goodbye!")
-            return
+            # A scripted run that processes nothing should fail visibly
+            return 0 if interactive else 1
 
         # Get processing options
-        options = get_processing_options()
+        options = get_processing_options(args, interactive)
 
         print(f"\n🚀 Starting categorization of {selected_file.name}...")
 
+        from src.processor import process_csv_file
+
         # Process the file
         summary = process_csv_file(
             str(selected_file),
@@ -211,6 +311,8 @@ def main():
             excel_compatible=options["excel_compatible"],
             concurrent=options["concurrent"],
             max_workers=options["max_workers"],
+            use_cache=args.use_cache,
+            confirm_large=interactive,
         )
 
         if summary:
@@ -5,11 +5,321 @@ This module handles all interactions with the Brønnøysundregistrene API
 for fetching company data from the Norwegian business registry.
 """
 
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
 import requests
 import certifi
-import ssl
-from urllib.parse import urlencode
-from .config import BASE_URL, SSL_VERIFY
+import urllib3
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .config import (
+    BASE_URL,
+    API_RATE_LIMIT,
+    RESPONSE_CACHE_PATH,
+    RESPONSE_CACHE_TTL,
+    get_ssl_verify,
+)
+from .utils import normalize_company_name
+
+logger = logging.getLogger(__name__)
+
+# Resolve the CA bundle once at import instead of on every request
+_CA_BUNDLE = certifi.where()
+
+# Shared session so connections (and TLS handshakes) are reused across requests
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=32,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            # Hand back the last response once retries run out, so throttling
+            # shows up in its retry history and raise_for_status reports it
+            raise_on_status=False,
+        ),
+    ),
+)
+_session_lock = threading.Lock()
+_session_verify_resolved = False
+
+# Token bucket shared by all threads so concurrent workers stay within the
+# API rate limit together (cache hits don't consume tokens). The rate adapts:
+# it is halved when BRREG answers 429 to a request sent at the current rate, and
+# recovers towards the configured ceiling while requests go unthrottled
+_rate_ceiling = API_RATE_LIMIT
+_rate_limit = API_RATE_LIMIT
+_rate_tokens = max(1.0, API_RATE_LIMIT)
+_rate_updated = time.monotonic()
+_rate_decreased_at = _rate_updated
+_rate_changed_at = _rate_updated
+_rate_lock = threading.Lock()
+
+# Seconds without throttling before the rate is raised again, and by how much
+_RATE_RECOVERY_INTERVAL = 5.0
+_RATE_RECOVERY_FACTOR = 1.25
+
+# Persistent response cache, opened on first use and shared across threads
+_response_cache = None
+_response_cache_enabled = True
+_response_cache_failed = False
+_response_cache_lock = threading.Lock()
+
+# Worker pools reused by fetch_many across calls (e.g. one call per batch),
+# keyed by their number of workers
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _get_response_cache():
+    """
+    Open (and create if needed) the on-disk BRREG response cache
+
+    Raises:
+        OSError: If the cache directory can't be created
+        sqlite3.Error: If the cache database can't be opened
+    """
+    global _response_cache
+    if _response_cache is None:
+        cache_dir = os.path.dirname(RESPONSE_CACHE_PATH)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        connection = sqlite3.connect(RESPONSE_CACHE_PATH, check_same_thread=False)
+        try:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "name TEXT, size INTEGER, fetched_at REAL, payload TEXT, "
+                "PRIMARY KEY (name, size))"
+            )
+        except sqlite3.Error:
+            connection.close()
+            raise
+        _response_cache = connection
+    return _response_cache
+
+
+def _disable_response_cache(error):
+    """Stop using the response cache for the rest of the run after an error"""
+    global _response_cache_failed
+    with _response_cache_lock:
+        if _response_cache_failed:
+            return
+        _response_cache_failed = True
+    logger.warning(
+        "Response cache unavailable, fetching from the API instead: %s", error
+    )
+
+
+def set_response_cache_enabled(enabled):
+    """
+    Turn the on-disk response cache on or off (e.g. to force fresh BRREG data)
+
+    Args:
+        enabled (bool): Whether responses are read from and written to the cache
+    """
+    global _response_cache_enabled
+    _response_cache_enabled = enabled
+
+
+def is_response_cache_enabled():
+    """Return whether the on-disk response cache is turned on"""
+    return _response_cache_enabled
+
+
+def _read_cached_response(company_name, size):
+    """Return cached companies for a name, or None if missing or expired"""
+    if not _response_cache_enabled or _response_cache_failed:
+        return None
+
+    try:
+        with _response_cache_lock:
+            row = (
+                _get_response_cache()
+                .execute(
+                    "SELECT fetched_at, payload FROM responses "
+                    "WHERE name = ? AND size = ?",
+                    (normalize_company_name(company_name), size),
+                )
+                .fetchone()
+            )
+    except (OSError, sqlite3.Error) as e:
+        _disable_response_cache(e)
+        return None
+
+    if row is None:
+        return None
+
+    try:
+        if time.time() - row[0] > RESPONSE_CACHE_TTL:
+            return None
+        return json.loads(row[1])
+    except (TypeError, ValueError) as e:
+        # A corrupt or truncated row is a miss; the refetch overwrites it
+        logger.warning(
+            "Ignoring corrupt response cache entry for %s: %s", company_name, e
+        )
+        return None
+
+
+def _write_cached_response(company_name, size, companies):
+    """Store the companies returned for a name in the response cache"""
+    if not _response_cache_enabled or _response_cache_failed:
+        return
+
+    try:
+        with _response_cache_lock:
+            cache = _get_response_cache()
+            cache.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (
+                    normalize_company_name(company_name),
+                    size,
+                    time.time(),
+                    json.dumps(companies),
+                ),
+            )
+            cache.commit()
+    except (OSError, sqlite3.Error) as e:
+        _disable_response_cache(e)
+
+
+def set_rate_limit(requests_per_second):
+    """
+    Change the maximum number of BRREG requests per second
+
+    Args:
+        requests_per_second (float): New limit shared by all threads (0 disables
+            it). Throttling by the API lowers the effective rate temporarily,
+            but it never rises above this value
+    """
+    global _rate_ceiling, _rate_limit, _rate_tokens
+    global _rate_decreased_at, _rate_changed_at
+    with _rate_lock:
+        _rate_ceiling = _rate_limit = requests_per_second
+        _rate_tokens = min(_rate_tokens, max(1.0, requests_per_second))
+        _rate_decreased_at = _rate_changed_at = time.monotonic()
+
+
+def get_rate_limit():
+    """Return the configured maximum number of BRREG requests per second"""
+    with _rate_lock:
+        return _rate_ceiling
+
+
+def _wait_for_rate_limit():
+    """Block until the token bucket allows another API request"""
+    global _rate_tokens, _rate_updated
+    while True:
+        with _rate_lock:
+            if _rate_limit <= 0:
+                return
+
+            # Refill for the time elapsed, allowing bursts of up to one second
+            now = time.monotonic()
+            _rate_tokens = min(
+                max(1.0, _rate_limit),
+                _rate_tokens + (now - _rate_updated) * _rate_limit,
+            )
+            _rate_updated = now
+
+            if _rate_tokens >= 1:
+                _rate_tokens -= 1
+                return
+            wait = (1 - _rate_tokens) / _rate_limit
+        time.sleep(wait)
+
+
+def _record_rate_feedback(throttled, sent_at):
+    """
+    Adapt the request rate to whether the API had to throttle a request
+
+    Args:
+        throttled (bool): Whether BRREG answered the request with 429
+        sent_at (float): time.monotonic() when the request was sent
+    """
+    global _rate_limit, _rate_decreased_at, _rate_changed_at
+    with _rate_lock:
+        if _rate_ceiling <= 0:
+            return
+
+        now = time.monotonic()
+        if throttled:
+            # Requests already in flight when the rate was lowered report the
+            # same burst of throttling; only react to requests sent since
+            if sent_at < _rate_decreased_at:
+                return
+            # Back off hard, but keep making progress
+            new_limit = max(0.5, _rate_limit / 2)
+            if new_limit < _rate_limit:
+                logger.warning(
+                    "BRREG is throttling requests, slowing down to %.1f/s", new_limit
+                )
+                _rate_limit = new_limit
+            _rate_decreased_at = _rate_changed_at = now
+            return
+
+        if (
+            _rate_limit < _rate_ceiling
+            and now - _rate_changed_at >= _RATE_RECOVERY_INTERVAL
+        ):
+            _rate_limit = min(_rate_ceiling, _rate_limit * _RATE_RECOVERY_FACTOR)
+            _rate_changed_at = now
+
+
+def _was_throttled(response):
+    """Check whether urllib3 had to retry this request after an HTTP 429"""
+    retries = getattr(getattr(response, "raw", None), "retries", None)
+    return retries is not None and any(entry.status == 429 for entry in retries.history)
+
+
+def _get_session():
+    """Return the shared session, resolving SSL verification on first use"""
+    global _session_verify_resolved
+    if not _session_verify_resolved:
+        with _session_lock:
+            if not _session_verify_resolved:
+                if get_ssl_verify():
+                    _SESSION.verify = _CA_BUNDLE
+                else:
+                    # Disable SSL warnings once for environments with certificate issues
+                    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+                    _SESSION.verify = False
+                _session_verify_resolved = True
+    return _SESSION
+
+
+def _disable_ssl_verification(ssl_error):
+    """Switch the shared session to unverified HTTPS after a certificate error"""
+    with _session_lock:
+        if _SESSION.verify is False:
+            return
+        logger.warning(
+            "SSL Error: %s - retrying without SSL verification for the rest of "
+            "the run (set SSL_VERIFY=false to skip this check)",
+            ssl_error,
+        )
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        _SESSION.verify = False
+
+
+def _request_companies(params):
+    """Send one rate-limited search request and return the companies found"""
+    _wait_for_rate_limit()
+    sent_at = time.monotonic()
+    response = _get_session().get(BASE_URL, params=params, timeout=10)
+    _record_rate_feedback(_was_throttled(response), sent_at)
+    response.raise_for_status()
+    data = response.json()
+
+    return data.get("_embedded", {}).get("enheter", [])
 
 
 def fetch_companies_by_name(company_name, size=10):
@@ -23,50 +333,69 @@ def fetch_companies_by_name(company_name, size=10):
     Returns:
         list: List of company data dictionaries, or empty list if error
     """
+    # Reuse a response from an earlier run if it's still fresh
+    companies = _read_cached_response(company_name, size)
+    if companies is not None:
+        return companies
+
     params = {
         "navn": company_name,
         "size": size,  # Get up to 10 matches for better selection
     }
 
-    url = f"{BASE_URL}?{urlencode(params)}"
-
     try:
-        # Use SSL verification based on configuration
-        if SSL_VERIFY:
-            response = requests.get(
-                url, timeout=10, verify=certifi.where()  # Use certifi bundle explicitly
-            )
-        else:
-            # Disable SSL verification for environments with certificate issues
-            import urllib3
-
-            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-            response = requests.get(url, timeout=10, verify=False)
-
-        response.raise_for_status()
-        data = response.json()
-
-        companies = data.get("_embedded", {}).get("enheter", [])
-        return companies
+        companies = _request_companies(params)
 
     except requests.exceptions.SSLError as ssl_error:
-        print(f"SSL Error for {company_name}: {ssl_error}")
-        print("Trying without SSL verification...")
-
-        # Retry without SSL verification as fallback
+        # Retry without SSL verification as fallback, e.g. behind proxies that
+        # intercept certificates but aren't recognised by _detect_ssl_issues
+        _disable_ssl_verification(ssl_error)
         try:
-            import urllib3
-
-            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-            response = requests.get(url, timeout=10, verify=False)
-            response.raise_for_status()
-            data = response.json()
-            companies = data.get("_embedded", {}).get("enheter", [])
-            return companies
+            companies = _request_companies(params)
         except Exception as fallback_error:
-            print(f"Fallback also failed for {company_name}: {fallback_error}")
+            logger.warning(
+                "Fallback also failed for %s: %s", company_name, fallback_error
+            )
             return []
 
     except Exception as e:
-        print(f"Error fetching {company_name}: {e}")
+        logger.warning("Error fetching %s: %s", company_name, e)
         return []
+
+    _write_cached_response(company_name, size, companies)
+    return companies
+
+
+def _get_executor(max_workers):
+    """Return the shared worker pool with max_workers threads, creating it once"""
+    with _executors_lock:
+        executor = _executors.get(max_workers)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="brreg-fetch"
+            )
+            _executors[max_workers] = executor
+        return executor
+
+
+def fetch_many(company_names, max_workers=5, size=10):
+    """
+    Fetch companies for several names concurrently from BRREG API
+
+    Network latency is overlapped across up to max_workers in-flight requests
+    instead of being paid one name at a time. The worker threads are kept
+    for later calls, so batched runs don't start a new pool per batch.
+
+    Args:
+        company_names (list): Names of the companies to search for
+        max_workers (int): Maximum number of concurrent requests (default: 5)
+        size (int): Maximum number of results per name (default: 10)
+
+    Returns:
+        list: One list of company data dictionaries per name, in input order
+    """
+    return list(
+        _get_executor(max_workers).map(
+            lambda name: fetch_companies_by_name(name, size), company_names
+        )
+    )
@@ -5,9 +5,57 @@ This module contains the core business logic for categorizing Norwegian companie
 based on their næringskoder (industry codes) and keywords from company data.
 """
 
-from .config import PRODUCT_CATEGORIES, CATEGORY_IDS
+from .config import PRODUCT_CATEGORIES, CATEGORY_IDS, SUBSEGMENT_RULES
+import logging
+import threading
 from .utils import extract_naringskoder, format_naringskoder
-from .company_matcher import fetch_company_by_name
+from .company_matcher import clear_company_cache, fetch_company_by_name
+
+logger = logging.getLogger(__name__)
+
+# Cache of categorization results keyed on normalized company name, so
+# duplicate names in an input file are only categorized once
+_categorization_cache = {}
+_categorization_cache_lock = threading.Lock()
+
+# Lowercased keywords (with their lengths) per category, built once at import
+# instead of per company
+_CATEGORY_KEYWORDS = {
+    category: tuple(
+        (keyword.lower(), keyword, len(keyword)) for keyword in info["keywords"]
+    )
+    for category, info in PRODUCT_CATEGORIES.items()
+}
+
+# Same keywords ordered longest first (stable, so equal lengths keep config
+# order) for early exit when scoring næringskode descriptions
+_CATEGORY_KEYWORDS_LONGEST_FIRST = {
+    category: tuple(sorted(keywords, key=lambda entry: -entry[2]))
+    for category, keywords in _CATEGORY_KEYWORDS.items()
+}
+
+# Flat (keyword, category) table so company text is scanned in a single pass
+_KEYWORD_TABLE = tuple(
+    (keyword_lc, keyword, keyword_len, category)
+    for category, keywords in _CATEGORY_KEYWORDS.items()
+    for keyword_lc, keyword, keyword_len in keywords
+)
+
+
+def _build_code_trie():
+    """Build a prefix trie over all næringskode prefixes in PRODUCT_CATEGORIES"""
+    trie = {}
+    for category, info in PRODUCT_CATEGORIES.items():
+        for prefix in info["codes"]:
+            node = trie
+            for char in prefix:
+                node = node.setdefault(char, {})
+            # Terminal "$" lists the categories owning the prefix ending here
+            node.setdefault("$", []).append(category)
+    return trie
+
+
+_CODE_TRIE = _build_code_trie()
 
 
 def calculate_confidence_score(
@@ -76,88 +124,121 @@ def calculate_confidence_score(
     return min(confidence, 0.99)
 
 
+def match_code_prefixes(code):
+    """Find the longest configured prefix of a næringskode for each category"""
+    matches = {}
+    node = _CODE_TRIE
+
+    # Walk the trie once; deeper terminals overwrite shorter prefix matches
+    for depth, char in enumerate(code, 1):
+        node = node.get(char)
+        if node is None:
+            break
+        for category in node.get("$", ()):
+            matches[category] = depth
+
+    return matches
+
+
 def categorize_by_naringskode(naringskoder):
-    """Categorize company based on næringskoder with improved matching"""
+    """
+    Categorize company based on næringskoder with improved matching
+
+    Returns:
+        tuple: (category, match_info, description) where match_info holds the
+            matched "code" and the description "keywords" that matched (empty
+            for a direct code match)
+    """
     best_match = None
     best_score = 0
 
-    for category, info in PRODUCT_CATEGORIES.items():
-        for naringskode in naringskoder:
-            code = naringskode.get("kode", "")
-            description = naringskode.get("beskrivelse", "").lower()
-
-            # Check exact code matches first
-            for prefix in info["codes"]:
-                if code.startswith(prefix):
-                    # Prioritize more specific matches (longer prefixes)
-                    score = len(prefix)
-                    if score > best_score:
-                        best_match = (
-                            category,
-                            code,
-                            naringskode.get("beskrivelse", ""),
-                        )
-                        best_score = score
-
-            # Also check description for keyword matches
-            for keyword in info["keywords"]:
-                if keyword.lower() in description:
-                    score = len(keyword) * 0.5  # Lower priority than code matches
-                    if score > best_score:
-                        best_match = (
-                            category,
-                            f"{code} (keyword: {keyword})",
-                            naringskode.get("beskrivelse", ""),
-                        )
-                        best_score = score
-
-    return best_match if best_match else ("Uncategorized", "", "")
+    # One trie walk per næringskode instead of a startswith per category prefix,
+    # and descriptions lowercased once rather than once per category
+    code_matches = [match_code_prefixes(nk.get("kode", "")) for nk in naringskoder]
+    descriptions = [nk.get("beskrivelse", "").lower() for nk in naringskoder]
 
+    for category in PRODUCT_CATEGORIES:
+        keywords_longest_first = _CATEGORY_KEYWORDS_LONGEST_FIRST[category]
+        for naringskode, prefix_lengths, description in zip(
+            naringskoder, code_matches, descriptions
+        ):
+            code = naringskode.get("kode", "")
 
-def categorize_by_keywords(company_data):
-    """Enhanced fallback categorization using keywords from multiple fields"""
-    text_fields = []
+            # Check exact code matches first, prioritizing more specific
+            # matches (longer prefixes)
+            score = prefix_lengths.get(category, 0)
+            if score > best_score:
+                best_match = (
+                    category,
+                    {"code": code, "keywords": []},
+                    naringskode.get("beskrivelse", ""),
+                )
+                best_score = score
+
+            # Also check description for keyword matches, longest keywords
+            # first: stop at the first hit, or once no remaining keyword could
+            # beat the current best score
+            for keyword_lc, keyword, keyword_len in keywords_longest_first:
+                score = keyword_len * 0.5  # Lower priority than code matches
+                if score <= best_score:
+                    break
+                if keyword_lc in description:
+                    best_match = (
+                        category,
+                        {"code": code, "keywords": [keyword]},
+                        naringskode.get("beskrivelse", ""),
+                    )
+                    best_score = score
+                    break
+
+    if best_match:
+        return best_match
+    return ("Uncategorized", {"code": "", "keywords": []}, "")
+
+
+def _iter_company_text(company_data):
+    """Yield the name, activities, statutory purposes and VAT descriptions"""
+    yield company_data.get("navn", "")
+    yield from company_data.get("aktivitet") or ()
+    yield from company_data.get("vedtektsfestetFormaal") or ()
+    # Also check VAT descriptions if available
+    yield from company_data.get("frivilligMvaRegistrertBeskrivelser") or ()
 
-    # Collect all text to analyze
-    text_fields.append(company_data.get("navn", "").lower())
 
-    aktivitet = company_data.get("aktivitet", [])
-    if aktivitet:
-        text_fields.extend([act.lower() for act in aktivitet])
+def categorize_by_keywords(company_data):
+    """
+    Enhanced fallback categorization using keywords from multiple fields
 
-    vedtekt = company_data.get("vedtektsfestetFormaal", [])
-    if vedtekt:
-        text_fields.extend([ved.lower() for ved in vedtekt])
+    Returns:
+        tuple: (category, match_info, description) where match_info holds the
+            match "code" ("keyword_match" or "no_match") and the matched
+            "keywords"
+    """
+    # Collect all text to analyze and lowercase it in one go
+    combined_text = " ".join(_iter_company_text(company_data)).lower()
 
-    # Also check VAT descriptions if available
-    mva_beskrivelser = company_data.get("frivilligMvaRegistrertBeskrivelser", [])
-    if mva_beskrivelser:
-        text_fields.extend([mva.lower() for mva in mva_beskrivelser])
+    # Scan the text once against every keyword, accumulating per-category scores
+    category_scores = {}
+    matched_keywords = {}
 
-    combined_text = " ".join(text_fields)
+    for keyword_lc, keyword, keyword_len, category in _KEYWORD_TABLE:
+        if keyword_lc in combined_text:
+            category_scores[category] = category_scores.get(category, 0) + keyword_len
+            matched_keywords.setdefault(category, []).append(keyword)
 
-    # Find best keyword match with scoring
+    # Highest score wins; ties go to the category listed first in config
     best_match = None
-    best_score = 0
-
-    for category, info in PRODUCT_CATEGORIES.items():
-        category_score = 0
-        matched_keywords = []
-
-        for keyword in info["keywords"]:
-            if keyword.lower() in combined_text:
-                category_score += len(keyword)
-                matched_keywords.append(keyword)
-
-        if category_score > best_score:
-            best_match = (
-                category,
-                "keyword_match",
-                f"Keywords: {', '.join(matched_keywords)}",
-            )
-            best_score = category_score
+    if category_scores:
+        category = max(category_scores, key=category_scores.get)
+        best_match = (
+            category,
+            {"code": "keyword_match", "keywords": matched_keywords[category]},
+            f"Keywords: {', '.join(matched_keywords[category])}",
+        )
 
-    return best_match if best_match else ("Uncategorized", "no_match", "")
+    if best_match:
+        return best_match
+    return ("Uncategorized", {"code": "no_match", "keywords": []}, "")
 
 
 def get_subsegment_suggestion(category, company_data):
@@ -172,54 +253,62 @@ def get_subsegment_suggestion(category, company_data):
     # Simple heuristic to suggest subsegment based on keywords
     text = f"{company_data.get('navn', '')} {' '.join(company_data.get('aktivitet', []))}".lower()
 
-    # Category-specific subsegment logic
-    if category == "Fashion & Personal Accessories":
-        if any(word in text for word in ["barn", "child", "kid"]):
-            return "Childrenswear"
-        elif any(word in text for word in ["sko", "shoe", "footwear"]):
-            return "Footwear"
-        elif any(word in text for word in ["sport"]):
-            return "Sportswear"
-        elif any(word in text for word in ["brille", "eyewear", "glasses"]):
-            return "Eyewear"
-        elif any(word in text for word in ["veske", "bag", "luggage"]):
-            return "Bags and Luggage"
-        elif any(word in text for word in ["smykke", "jewelry", "jewellery"]):
-            return "Jewellery"
-        elif any(word in text for word in ["klokke", "watch"]):
-            return "Traditional and Connected Watches"
-        else:
-            return "Apparel"
-
-    elif category == "Services, Trade & Institutions":
-        if any(word in text for word in ["bank", "finans", "finance"]):
-            return "Finance & Insurance"
-        elif any(word in text for word in ["handel", "retail", "butikk"]):
-            return "Retail & Wholesale"
-        elif any(word in text for word in ["IT", "software", "data", "tech"]):
-            return "Information & Communications"
-        elif any(word in text for word in ["bygg", "construction", "eiendom"]):
-            return "Construction & Real Estate"
-        elif any(word in text for word in ["hotell", "restaurant"]):
-            return "Hotels & Restaurants"
-        elif any(word in text for word in ["skole", "utdanning", "education"]):
-            return "Education"
-        elif any(word in text for word in ["transport", "logistikk"]):
-            return "Transport & Storage"
-        else:
-            return "Business Services"
+    # Category-specific subsegment rules: first rule with a trigger word wins
+    rules = SUBSEGMENT_RULES.get(category)
+    if rules:
+        for subsegment, trigger_words in rules["rules"]:
+            if any(word in text for word in trigger_words):
+                return subsegment
+        return rules["default"]
 
     # Return first subsegment as default
-    return subsegments[0] if subsegments else ""
+    return subsegments[0]
+
+
+def is_categorization_cached(company_name):
+    """Check whether a company name has already been categorized in this run"""
+    with _categorization_cache_lock:
+        return company_name.lower().strip() in _categorization_cache
+
 
+def clear_categorization_cache():
+    """Forget the categorizations (and company selections) made in this process"""
+    with _categorization_cache_lock:
+        _categorization_cache.clear()
+    clear_company_cache()
 
-def categorize_company(company_name, quiet=False):
-    """Main function to categorize a single company with enhanced granular confidence metrics"""
-    if not quiet:
-        print(f"Processing: {company_name}")
 
+def categorize_company(company_name, quiet=False, companies=None):
+    """
+    Main function to categorize a single company with enhanced granular confidence metrics
+
+    Args:
+        company_name (str): Name of the company to categorize
+        quiet (bool): Suppress company selection debug logging
+        companies (list): Pre-fetched BRREG search results for company_name,
+            e.g. from api_client.fetch_many (fetched on demand if None)
+    """
+    logger.debug("Processing: %s", company_name)
+
+    # Check cache first (thread-safe). Only case and surrounding whitespace are
+    # folded: selection and confidence depend on the rest of the name as given
+    cache_key = company_name.lower().strip()
+    with _categorization_cache_lock:
+        cached = _categorization_cache.get(cache_key)
+
+    if cached is None:
+        cached = _categorize_uncached(company_name, quiet, companies)
+        with _categorization_cache_lock:
+            _categorization_cache[cache_key] = cached
+
+    # Report the name as given, even when the result came from another casing
+    return dict(cached, company_name=company_name)
+
+
+def _categorize_uncached(company_name, quiet, companies):
+    """Categorize a single company without consulting the result cache"""
     # Fetch company data with intelligent selection
-    result = fetch_company_by_name(company_name, quiet=quiet)
+    result = fetch_company_by_name(company_name, quiet=quiet, companies=companies)
 
     if not result:
         return {
@@ -267,24 +356,21 @@ def categorize_company(company_name, quiet=False):
         naringskode_result = categorize_by_naringskode(naringskoder)
 
         if naringskode_result[0] != "Uncategorized":
-            category, code, description = naringskode_result
+            category, match_info, description = naringskode_result
+            code = match_info["code"]
             method = "naringskode"
             confidence = "High"
 
             # Set granular flags
             categorized_by_naringskode = 1
-            primary_naringskode = (
-                code.split(" ")[0] if code else ""
-            )  # Extract just the code part
+            primary_naringskode = code
 
             # NEW CONFIDENCE SCORE LOGIC
             # Start with base confidence for næringskode categorization
-            if "(keyword:" in code:
+            if match_info["keywords"]:
                 keyword_match = 1
                 base_confidence = 0.85  # Lower for keyword match within næringskode
-                matching_keywords = (
-                    code.split("keyword: ")[1].rstrip(")") if "keyword:" in code else ""
-                )
+                matching_keywords = ", ".join(match_info["keywords"])
             else:
                 exact_code_match = 1
                 base_confidence = 0.95  # Higher for exact code match
@@ -301,15 +387,15 @@ def categorize_company(company_name, quiet=False):
         else:
             # Fallback to keyword matching
             keyword_result = categorize_by_keywords(company_data)
-            category, code, description = keyword_result
+            category, match_info, description = keyword_result
+            code = match_info["code"]
             method = "keywords"
-            confidence = "Medium" if code != "no_match" else "Low"
+            confidence = "Medium" if match_info["keywords"] else "Low"
 
             # Set granular flags for keyword fallback
-            keyword_match = 1 if code != "no_match" else 0
-            base_confidence = 0.4 if code != "no_match" else 0.1
-            if "Keywords:" in description:
-                matching_keywords = description.replace("Keywords: ", "")
+            keyword_match = 1 if match_info["keywords"] else 0
+            base_confidence = 0.4 if match_info["keywords"] else 0.1
+            matching_keywords = ", ".join(match_info["keywords"])
 
             # Calculate confidence for keyword-based categorization
             confidence_score = calculate_confidence_score(
@@ -323,15 +409,15 @@ def categorize_company(company_name, quiet=False):
     else:
         # No næringskoder available, use keyword matching
         keyword_result = categorize_by_keywords(company_data)
-        category, code, description = keyword_result
+        category, match_info, description = keyword_result
+        code = match_info["code"]
         method = "keywords"
-        confidence = "Medium" if code != "no_match" else "Low"
+        confidence = "Medium" if match_info["keywords"] else "Low"
 
         # Set granular flags for pure keyword matching
-        keyword_match = 1 if code != "no_match" else 0
-        base_confidence = 0.3 if code != "no_match" else 0.05
-        if "Keywords:" in description:
-            matching_keywords = description.replace("Keywords: ", "")
+        keyword_match = 1 if match_info["keywords"] else 0
+        base_confidence = 0.3 if match_info["keywords"] else 0.05
+        matching_keywords = ", ".join(match_info["keywords"])
 
         # Calculate confidence for keyword-only categorization
         confidence_score = calculate_confidence_score(
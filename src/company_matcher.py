@@ -6,154 +6,240 @@ from multiple BRREG API results, prioritizing companies with næringskoder for
 better categorization outcomes.
 """
 
-from .utils import similarity_score, has_naringskoder, is_company_active
+from .utils import (
+    similarity_score,
+    has_naringskoder,
+    is_company_active,
+)
 from .api_client import fetch_companies_by_name
+import logging
 import threading
+from operator import itemgetter
+
+logger = logging.getLogger(__name__)
 
 # Simple cache for company data to avoid duplicate API calls
 _company_cache = {}
 _cache_lock = threading.Lock()
 
+# Organisation forms that adjust the relevance score
+_PREFERRED_ORG_CODES = frozenset(("AS", "ASA", "ENK", "DA", "BA", "SA"))
+_PENALIZED_ORG_CODES = frozenset(("NUF", "FIL"))
+
+
+def clear_company_cache():
+    """Forget the company selections made so far in this process"""
+    with _cache_lock:
+        _company_cache.clear()
 
-def get_company_relevance_score(company_data, search_name):
+
+def get_company_relevance_score(company_data, search_name, is_active=None):
     """Calculate relevance score for a company match (næringskoder handled separately)"""
     score = 0.0
-    company_name = company_data.get("navn", "")
+    get = company_data.get
 
     # 1. Name similarity (60% weight - increased since næringskoder removed)
-    name_similarity = similarity_score(search_name, company_name)
+    name_similarity = similarity_score(search_name, get("navn", ""))
     score += name_similarity * 0.6
 
     # 2. Company is active (25% weight - increased)
-    if is_company_active(company_data):
+    if is_active is None:
+        is_active = is_company_active(company_data)
+    if is_active:
         score += 0.25
 
     # 3. Has business activities or statutory purposes (10% weight)
-    if company_data.get("aktivitet") or company_data.get("vedtektsfestetFormaal"):
+    if get("aktivitet") or get("vedtektsfestetFormaal"):
         score += 0.10
 
     # 4. Company type bonus (5% weight)
-    org_form = company_data.get("organisasjonsform", {})
+    org_form = get("organisasjonsform")
     org_code = org_form.get("kode", "") if org_form else ""
 
     # Prefer main business entities over subsidiaries/branches
-    if org_code in ["AS", "ASA", "ENK", "DA", "BA", "SA"]:
+    if org_code in _PREFERRED_ORG_CODES:
         score += 0.05
-    elif org_code in ["NUF", "FIL"]:  # Foreign branches might be less relevant
+    elif org_code in _PENALIZED_ORG_CODES:  # Foreign branches might be less relevant
         score -= 0.02
 
     return score
 
 
-def select_best_company_match(companies, search_name, quiet=False):
-    """Select the best company match from multiple alternatives, prioritizing categorizable companies"""
+def build_candidate_records(companies):
+    """
+    Evaluate the per-company checks needed for selection in a single pass
+
+    Args:
+        companies (list): BRREG search results
+
+    Returns:
+        list: One dict per company with keys "company", "has_nk", "active"
+            and "name_lower"
+    """
+    return [
+        {
+            "company": company,
+            "has_nk": has_naringskoder(company),
+            "active": is_company_active(company),
+            "name_lower": company.get("navn", "").lower(),
+        }
+        for company in companies
+    ]
+
+
+def select_best_company_match(companies, search_name, quiet=False, records=None):
+    """
+    Select the best company match from multiple alternatives, prioritizing categorizable companies
+
+    Args:
+        companies (list): BRREG search results
+        search_name (str): Company name that was searched for
+        quiet (bool): Suppress selection debug logging
+        records (list): Output of build_candidate_records(companies), if the
+            caller has already computed it
+
+    Returns:
+        dict: Selected company data, or None if there are no companies
+    """
     if not companies:
         return None
 
     if len(companies) == 1:
         return companies[0]
 
-    if not quiet:
-        print(f"    Found {len(companies)} potential matches, evaluating...")
+    if records is None:
+        records = build_candidate_records(companies)
+
+    # Selection details are debug output; skip building them when not logged
+    verbose = not quiet and logger.isEnabledFor(logging.DEBUG)
+
+    if verbose:
+        logger.debug("Found %d potential matches, evaluating...", len(companies))
 
     # First, separate companies with and without næringskoder
-    companies_with_nk = [c for c in companies if has_naringskoder(c)]
-    companies_without_nk = [c for c in companies if not has_naringskoder(c)]
+    records_with_nk = [rec for rec in records if rec["has_nk"]]
+    companies_with_nk = [rec["company"] for rec in records_with_nk]
 
-    if not quiet:
-        print(f"    Companies with næringskoder: {len(companies_with_nk)}")
-        print(f"    Companies without næringskoder: {len(companies_without_nk)}")
+    if verbose:
+        logger.debug("Companies with næringskoder: %d", len(companies_with_nk))
+        logger.debug(
+            "Companies without næringskoder: %d",
+            len(companies) - len(companies_with_nk),
+        )
 
     # PRIORITY RULE: If exactly one company has næringskoder, always choose it
     if len(companies_with_nk) == 1:
         selected_company = companies_with_nk[0]
-        if not quiet:
-            print(
-                f"    ✓ SELECTED (only company with næringskoder): {selected_company.get('navn', 'N/A')}"
+        if verbose:
+            logger.debug(
+                "Selected (only company with næringskoder): %s",
+                selected_company.get("navn", "N/A"),
             )
         return selected_company
 
     # If multiple companies have næringskoder, score only those
     if len(companies_with_nk) > 1:
-        if not quiet:
-            print(
-                f"    Multiple companies with næringskoder found, scoring among them..."
+        if verbose:
+            logger.debug("Multiple companies with næringskoder, scoring among them")
+        records_to_score = records_with_nk
+    # Otherwise NO companies have næringskoder, fall back to scoring all
+    else:
+        if verbose:
+            logger.debug(
+                "No companies have næringskoder, will result in uncategorizable match"
             )
-        companies_to_score = companies_with_nk
-    # If NO companies have næringskoder, fall back to scoring all
-    elif len(companies_with_nk) == 0:
-        if not quiet:
-            print(
-                f"    ⚠️  No companies have næringskoder, will result in uncategorizable match"
+        records_to_score = records
+
+    # Duplicate hits for the same organisation leave nothing to choose between
+    org_numbers = {
+        rec["company"].get("organisasjonsnummer") for rec in records_to_score
+    }
+    if len(org_numbers) == 1 and None not in org_numbers:
+        selected_company = records_to_score[0]["company"]
+        if verbose:
+            logger.debug(
+                "Selected (all matches are the same organisation): %s",
+                selected_company.get("navn", "N/A"),
             )
-        companies_to_score = companies
-    else:
-        companies_to_score = companies
+        return selected_company
 
     # Score the selected group of companies
     scored_companies = []
-    for company in companies_to_score:
-        score = get_company_relevance_score(company, search_name)
-        scored_companies.append((score, company))
-
-        # Debug info (only in verbose mode)
-        if not quiet:
-            company_name = company.get("navn", "N/A")
-            org_num = company.get("organisasjonsnummer", "N/A")
-            has_nk = "✓" if has_naringskoder(company) else "✗"
-            is_active = "✓" if is_company_active(company) else "✗"
-            print(
-                f"      {score:.3f}: {company_name} (Org: {org_num}) [NK: {has_nk}, Active: {is_active}]"
+    best_score, best_company, best_rec = None, None, None
+    for rec in records_to_score:
+        company = rec["company"]
+        score = get_company_relevance_score(company, search_name, rec["active"])
+        scored_companies.append((score, company, rec["active"]))
+        # Track the leader while scoring; ties keep the earliest result
+        if best_company is None or score > best_score:
+            best_score, best_company, best_rec = score, company, rec
+
+        if verbose:
+            logger.debug(
+                "%.3f: %s (Org: %s) [NK: %s, Active: %s]",
+                score,
+                company.get("navn", "N/A"),
+                company.get("organisasjonsnummer", "N/A"),
+                "✓" if rec["has_nk"] else "✗",
+                "✓" if rec["active"] else "✗",
             )
 
-    # Sort by score (highest first)
-    scored_companies.sort(key=lambda x: x[0], reverse=True)
-    best_score, best_company = scored_companies[0]
-
     # Check if there are very close scores (within 0.1) for additional tie-breaking
-    close_matches = [sc for sc in scored_companies if abs(sc[0] - best_score) <= 0.1]
+    close_matches = [sc for sc in scored_companies if best_score - sc[0] <= 0.1]
 
     if len(close_matches) > 1:
-        if not quiet:
-            print(f"    {len(close_matches)} companies have similar scores...")
+        if verbose:
+            logger.debug("%d companies have similar scores", len(close_matches))
 
         # If we're already within companies with næringskoder, use other criteria
         if len(companies_with_nk) > 1:
             # Among companies with næringskoder, prefer active ones, then by name similarity
-            active_matches = [sc for sc in close_matches if is_company_active(sc[1])]
+            active_matches = [sc for sc in close_matches if sc[2]]
             if active_matches:
-                best_company = active_matches[0][1]
-                if not quiet:
-                    print(
-                        f"    Selected active company: {best_company.get('navn', 'N/A')}"
+                best_company = max(active_matches, key=itemgetter(0))[1]
+                if verbose:
+                    logger.debug(
+                        "Selected active company: %s", best_company.get("navn", "N/A")
                     )
-            else:
-                if not quiet:
-                    print(
-                        f"    Selected highest scored: {best_company.get('navn', 'N/A')}"
-                    )
-        else:
-            # We're in the fallback scenario - no companies have næringskoder
-            if not quiet:
-                print(
-                    f"    Selected highest scored (no næringskoder available): {best_company.get('navn', 'N/A')}"
+            elif verbose:
+                logger.debug(
+                    "Selected highest scored: %s", best_company.get("navn", "N/A")
                 )
-    else:
-        if not quiet:
-            selection_reason = (
-                "with næringskoder"
-                if has_naringskoder(best_company)
-                else "without næringskoder (uncategorizable)"
-            )
-            print(
-                f"    ✓ SELECTED ({selection_reason}): {best_company.get('navn', 'N/A')} (score: {best_score:.3f})"
+        elif verbose:
+            # We're in the fallback scenario - no companies have næringskoder
+            logger.debug(
+                "Selected highest scored (no næringskoder available): %s",
+                best_company.get("navn", "N/A"),
             )
+    elif verbose:
+        selection_reason = (
+            "with næringskoder"
+            if best_rec["has_nk"]
+            else "without næringskoder (uncategorizable)"
+        )
+        logger.debug(
+            "Selected (%s): %s (score: %.3f)",
+            selection_reason,
+            best_company.get("navn", "N/A"),
+            best_score,
+        )
 
     return best_company
 
 
-def fetch_company_by_name(company_name, quiet=False):
-    """Fetch company data by name with intelligent selection and caching"""
+def fetch_company_by_name(company_name, quiet=False, companies=None):
+    """
+    Fetch company data by name with intelligent selection and caching
+
+    Args:
+        company_name (str): Name of the company to search for
+        quiet (bool): Suppress selection debug logging
+        companies (list): Pre-fetched BRREG search results for company_name
+            (fetched from the API if None)
+
+    Returns:
+        tuple: (selected company data, search metadata), or None if not found
+    """
     # Normalize company name for cache key
     cache_key = company_name.lower().strip()
 
@@ -162,8 +248,9 @@ def fetch_company_by_name(company_name, quiet=False):
         if cache_key in _company_cache:
             return _company_cache[cache_key]
 
-    # Fetch from API if not in cache
-    companies = fetch_companies_by_name(company_name)
+    # Fetch from API if not in cache and not already fetched by the caller
+    if companies is None:
+        companies = fetch_companies_by_name(company_name)
 
     if not companies:
         # Cache the "not found" result to avoid repeated API calls
@@ -171,19 +258,23 @@ def fetch_company_by_name(company_name, quiet=False):
             _company_cache[cache_key] = None
         return None
 
+    # Evaluate each candidate once; selection and metadata share the results
+    records = build_candidate_records(companies)
+
     # Use intelligent selection to pick the best match
-    selected_company = select_best_company_match(companies, company_name, quiet=quiet)
+    selected_company = select_best_company_match(
+        companies, company_name, quiet=quiet, records=records
+    )
 
     # Prepare result
     result = None
     if selected_company:
+        query_lower = company_name.lower()
         search_metadata = {
             "total_matches": len(companies),
-            "companies_with_naringskoder": len(
-                [c for c in companies if has_naringskoder(c)]
-            ),
+            "companies_with_naringskoder": sum(1 for rec in records if rec["has_nk"]),
             "exact_name_match": any(
-                c.get("navn", "").lower() == company_name.lower() for c in companies
+                rec["name_lower"] == query_lower for rec in records
             ),
             "selected_company_has_naringskoder": has_naringskoder(selected_company),
         }
@@ -5,8 +5,10 @@ This module contains product category mappings based on Norwegian industry codes
 (næringskoder) and keywords for automated company categorization.
 """
 
+import functools
 import os
 import platform
+import types
 
 # BRREG API Configuration
 BASE_URL = "https://data.brreg.no/enhetsregisteret/api/enheter"
@@ -39,17 +41,42 @@ def _detect_ssl_issues():
 
 
 # SSL Configuration - set to False for virtual desktop environments with certificate issues
-SSL_VERIFY = os.getenv("SSL_VERIFY", str(_detect_ssl_issues())).lower() == "true"
+@functools.lru_cache(maxsize=None)
+def get_ssl_verify():
+    """Resolve the SSL verification setting on first use (SSL_VERIFY env var wins)"""
+    ssl_verify = os.getenv("SSL_VERIFY", str(_detect_ssl_issues())).lower() == "true"
 
-# Print SSL configuration on import (for debugging)
-if not SSL_VERIFY:
-    print(
-        "⚠️  SSL verification is disabled - API calls will bypass certificate validation"
-    )
+    # Print SSL configuration once (for debugging)
+    if not ssl_verify:
+        print(
+            "⚠️  SSL verification is disabled - API calls will bypass certificate validation"
+        )
+
+    return ssl_verify
+
+
+# Persistent BRREG response cache - reruns of the same names skip the API
+RESPONSE_CACHE_PATH = os.getenv(
+    "BRREG_CACHE_PATH", os.path.join(".cache", "brreg.sqlite")
+)
+RESPONSE_CACHE_TTL = 7 * 24 * 60 * 60  # Seconds before a cached response is refetched
+
+# Maximum BRREG requests per second, shared by all workers (0 disables the limit)
+API_RATE_LIMIT = float(os.getenv("BRREG_RATE_LIMIT", "10"))
 
 # CSV Configuration
 CSV_DELIMITER = ","  # Change to ";" for semicolon-separated files
 
+
+def _freeze(value):
+    """Recursively convert dicts to read-only mappings and lists to tuples"""
+    if isinstance(value, dict):
+        return types.MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
 # Category ID mapping (1-9)
 CATEGORY_IDS = {
     "Fashion & Personal Accessories": 1,
@@ -65,6 +92,7 @@ CATEGORY_IDS = {
     "Uncategorized": 0,
     "Not Found": 0,
 }
+CATEGORY_IDS = _freeze(CATEGORY_IDS)
 
 # Product category mapping based on grouping.md categories and næringskoder ranges
 PRODUCT_CATEGORIES = {
@@ -423,3 +451,37 @@ PRODUCT_CATEGORIES = {
         ],
     },
 }
+
+# Read-only from here on; lookup tables elsewhere are derived from it at import
+PRODUCT_CATEGORIES = _freeze(PRODUCT_CATEGORIES)
+
+# Subsegment rules: the first subsegment whose trigger words appear in the
+# company name/activities wins, otherwise the default is used. Categories not
+# listed here fall back to their first configured subsegment.
+SUBSEGMENT_RULES = {
+    "Fashion & Personal Accessories": {
+        "rules": [
+            ("Childrenswear", ("barn", "child", "kid")),
+            ("Footwear", ("sko", "shoe", "footwear")),
+            ("Sportswear", ("sport",)),
+            ("Eyewear", ("brille", "eyewear", "glasses")),
+            ("Bags and Luggage", ("veske", "bag", "luggage")),
+            ("Jewellery", ("smykke", "jewelry", "jewellery")),
+            ("Traditional and Connected Watches", ("klokke", "watch")),
+        ],
+        "default": "Apparel",
+    },
+    "Services, Trade & Institutions": {
+        "rules": [
+            ("Finance & Insurance", ("bank", "finans", "finance")),
+            ("Retail & Wholesale", ("handel", "retail", "butikk")),
+            ("Information & Communications", ("software", "data", "tech")),
+            ("Construction & Real Estate", ("bygg", "construction", "eiendom")),
+            ("Hotels & Restaurants", ("hotell", "restaurant")),
+            ("Education", ("skole", "utdanning", "education")),
+            ("Transport & Storage", ("transport", "logistikk")),
+        ],
+        "default": "Business Services",
+    },
+}
+SUBSEGMENT_RULES = _freeze(SUBSEGMENT_RULES)
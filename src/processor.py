@@ -6,29 +6,50 @@ categorizing the companies, and outputting results with categories included.
 """
 
 import csv
+import itertools
 import os
-import time
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
-from .categorizer import categorize_company
+from operator import itemgetter
+from .api_client import (
+    fetch_many,
+    get_rate_limit,
+    is_response_cache_enabled,
+    set_rate_limit,
+    set_response_cache_enabled,
+)
+from .categorizer import (
+    categorize_company,
+    clear_categorization_cache,
+    is_categorization_cached,
+)
+from .utils import normalize_company_name
 from .config import PRODUCT_CATEGORIES, CSV_DELIMITER
 
-# Global variables for progress tracking
-_progress_lock = threading.Lock()
-_processed_count = 0
+# Larger file buffers than the 8 KiB default, so reading and writing big CSVs
+# takes fewer system calls
+_IO_BUFFER_SIZE = 1 << 20
 
+# Companies whose BRREG lookups are fetched together before their rows are
+# categorized and emitted by process_companies_concurrent
+_FETCH_CHUNK_SIZE = 200
 
-def read_input_csv(file_path):
+# Characters removed when checking whether a revenue value is numeric
+_REVENUE_SEPARATORS = str.maketrans("", "", ',"')
+_NUMBER_SIGNS = str.maketrans("", "", ".-")
+
+
+def iter_input_csv(file_path, verbose=True):
     """
-    Read CSV file with company name and revenue columns
+    Stream company rows from a CSV file with company name and revenue columns
 
     Args:
         file_path (str): Path to input CSV file
+        verbose (bool): Report the detected layout and skipped rows
 
-    Returns:
-        list: List of dictionaries with 'company_name' and 'revenue' keys
+    Yields:
+        dict: One dictionary with 'company_name' and 'revenue' keys per valid row
 
     Raises:
         FileNotFoundError: If input file doesn't exist
@@ -37,9 +58,10 @@ def read_input_csv(file_path):
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"Input file not found: {file_path}")
 
-    companies = []
-
-    with open(file_path, "r", encoding="utf-8") as csvfile:
+    # newline="" leaves line endings to the csv module, as its docs require
+    with open(
+        file_path, "r", newline="", encoding="utf-8", buffering=_IO_BUFFER_SIZE
+    ) as csvfile:
         # Use configured delimiter (can be changed in config.py)
         reader = csv.reader(csvfile, delimiter=CSV_DELIMITER)
 
@@ -59,22 +81,20 @@ def read_input_csv(file_path):
         has_headers = True
         try:
             # Try to parse the second column as a number (remove commas first)
-            revenue_value = first_row[1].replace(",", "").replace('"', "").strip()
-            if (
-                revenue_value
-                and revenue_value.replace(".", "").replace("-", "").isdigit()
-            ):
+            revenue_value = first_row[1].translate(_REVENUE_SEPARATORS).strip()
+            if revenue_value and revenue_value.translate(_NUMBER_SIGNS).isdigit():
                 has_headers = False
         except (IndexError, AttributeError):
             pass
 
-        print(f"✓ Detected {'headers' if has_headers else 'no headers'}")
-        print(f"✓ Using column 1 as company name, column 2 as revenue")
-        print(
-            f"✓ Ignoring {len(first_row) - 2} additional columns"
-            if len(first_row) > 2
-            else "✓ Processing 2 columns"
-        )
+        if verbose:
+            print(f"✓ Detected {'headers' if has_headers else 'no headers'}")
+            print(f"✓ Using column 1 as company name, column 2 as revenue")
+            print(
+                f"✓ Ignoring {len(first_row) - 2} additional columns"
+                if len(first_row) > 2
+                else "✓ Processing 2 columns"
+            )
 
         # If first row is not headers, process it as data
         if not has_headers:
@@ -82,37 +102,79 @@ def read_input_csv(file_path):
             revenue = first_row[1].strip()
 
             if company_name:  # Only add if company name is not empty
-                companies.append({"company_name": company_name, "revenue": revenue})
+                yield {"company_name": company_name, "revenue": revenue}
 
         # Process remaining rows
         for row_num, row in enumerate(reader, start=2 if has_headers else 3):
             # Skip rows with insufficient columns
             if len(row) < 2:
-                print(f"⚠️  Warning: Row {row_num} has insufficient columns, skipping")
+                if verbose:
+                    print(
+                        f"⚠️  Warning: Row {row_num} has insufficient columns, skipping"
+                    )
                 continue
 
             company_name = row[0].strip()
             revenue = row[1].strip()
 
             if not company_name:
-                print(f"⚠️  Warning: Empty company name in row {row_num}, skipping")
+                if verbose:
+                    print(f"⚠️  Warning: Empty company name in row {row_num}, skipping")
                 continue
 
-            companies.append({"company_name": company_name, "revenue": revenue})
+            yield {"company_name": company_name, "revenue": revenue}
+
+
+def read_input_csv(file_path):
+    """
+    Read CSV file with company name and revenue columns
+
+    Args:
+        file_path (str): Path to input CSV file
+
+    Returns:
+        list: List of dictionaries with 'company_name' and 'revenue' keys
 
+    Raises:
+        FileNotFoundError: If input file doesn't exist
+        ValueError: If file has insufficient columns
+    """
+    companies = list(iter_input_csv(file_path))
     print(f"✓ Loaded {len(companies)} companies from {file_path}")
     return companies
 
 
-def process_single_company(company_data, progress_callback=None):
-    """Process a single company - used for concurrent processing"""
-    global _processed_count
+def count_input_rows(file_path):
+    """
+    Count the companies in a CSV file without keeping the rows in memory
 
-    # Categorize the company (quiet mode for performance)
-    categorization_result = categorize_company(company_data["company_name"], quiet=True)
+    Args:
+        file_path (str): Path to input CSV file
 
-    # Create result record with granular metrics
-    result = {
+    Returns:
+        int: Number of valid company rows
+
+    Raises:
+        FileNotFoundError: If input file doesn't exist
+        ValueError: If file has insufficient columns
+    """
+    total = sum(1 for _ in iter_input_csv(file_path))
+    print(f"✓ Found {total} companies in {file_path}")
+    return total
+
+
+def build_result_record(company_data, categorization_result):
+    """
+    Combine an input row with its categorization into an output result record
+
+    Args:
+        company_data (dict): Input row with 'company_name' and 'revenue' keys
+        categorization_result (dict): Result of categorize_company()
+
+    Returns:
+        dict: Result record keyed by output field name
+    """
+    return {
         "company_name": company_data["company_name"],
         "company_category": categorization_result["category"],
         "category_id": categorization_result.get("category_id", 0),
@@ -135,14 +197,20 @@ def process_single_company(company_data, progress_callback=None):
         "method": categorization_result.get("method", ""),
     }
 
-    # Thread-safe progress tracking
-    with _progress_lock:
-        _processed_count += 1
-        current_count = _processed_count
+
+def process_single_company(company_data, progress_callback=None, companies=None):
+    """Process a single company - used for concurrent processing"""
+    # Categorize the company (quiet mode for performance)
+    categorization_result = categorize_company(
+        company_data["company_name"], quiet=True, companies=companies
+    )
+
+    # Create result record with granular metrics
+    result = build_result_record(company_data, categorization_result)
 
     # Call progress callback if provided
     if progress_callback:
-        progress_callback(current_count, result)
+        progress_callback(result)
 
     return result
 
@@ -159,9 +227,6 @@ def process_companies_concurrent(companies, progress_callback=None, max_workers=
     Returns:
         list: List of processed company dictionaries with categories
     """
-    global _processed_count
-    _processed_count = 0  # Reset counter
-
     results = []
     total = len(companies)
 
@@ -170,8 +235,11 @@ def process_companies_concurrent(companies, progress_callback=None, max_workers=
     )
     print("=" * 60)
 
-    # Progress tracking callback
-    def progress_tracker(current_count, result):
+    # Progress tracking callback; the count is local to this call
+    processed = itertools.count(1)
+
+    def progress_tracker(result):
+        current_count = next(processed)
         if current_count % 100 == 0 or current_count <= 10:
             print(
                 f"[{current_count:5}/{total}] {result['company_name']} -> {result['company_category']}"
@@ -179,48 +247,57 @@ def process_companies_concurrent(companies, progress_callback=None, max_workers=
             if result["selected_company"] != result["company_name"]:
                 print(f"          [Selected: {result['selected_company']}]")
 
-    # Use ThreadPoolExecutor for concurrent processing
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all tasks
-        future_to_company = {
-            executor.submit(process_single_company, company, progress_tracker): company
-            for company in companies
-        }
-
-        # Collect results as they complete
-        for future in as_completed(future_to_company):
-            try:
-                result = future.result()
-                results.append(result)
+    # Work through the input in chunks: fetch every distinct name in the chunk
+    # not categorized earlier in this run, so network latency overlaps across
+    # max_workers in-flight requests, then categorize and emit the chunk's rows
+    # before fetching the next one
+    for start in range(0, total, _FETCH_CHUNK_SIZE):
+        chunk = companies[start : start + _FETCH_CHUNK_SIZE]
+
+        unique_names = {}
+        for company in chunk:
+            if not is_categorization_cached(company["company_name"]):
+                unique_names.setdefault(
+                    normalize_company_name(company["company_name"]),
+                    company["company_name"],
+                )
 
-                # Custom progress callback
-                if progress_callback:
-                    progress_callback(_processed_count, total, result)
+        # Dispatch in sorted order so alphabetically adjacent names are queried
+        # together; results are looked up by name, so input order is unaffected
+        fetch_keys = sorted(unique_names)
+        search_results = dict(
+            zip(
+                fetch_keys,
+                fetch_many(
+                    [unique_names[key] for key in fetch_keys],
+                    max_workers=max_workers,
+                ),
+            )
+        )
 
+        for company in chunk:
+            try:
+                result = process_single_company(
+                    company,
+                    progress_tracker,
+                    search_results.get(normalize_company_name(company["company_name"])),
+                )
             except Exception as e:
-                company = future_to_company[future]
                 print(f"❌ Error processing {company['company_name']}: {e}")
                 # Add a failed result to maintain count
-                results.append(
-                    {
-                        "company_name": company["company_name"],
-                        "company_category": "Error",
-                        "category_id": 0,
-                        "revenue": company["revenue"],
-                        "confidence_score": 0.0,
-                        "method": "error",
-                    }
-                )
-
-    # Sort results by original order (if needed, maintain input order)
-    company_names = [c["company_name"] for c in companies]
-    results.sort(
-        key=lambda x: (
-            company_names.index(x["company_name"])
-            if x["company_name"] in company_names
-            else len(company_names)
-        )
-    )
+                result = {
+                    "company_name": company["company_name"],
+                    "company_category": "Error",
+                    "category_id": 0,
+                    "revenue": company["revenue"],
+                    "confidence_score": 0.0,
+                    "method": "error",
+                }
+            results.append(result)
+
+            # Custom progress callback (also sees failed rows, e.g. to write them out)
+            if progress_callback:
+                progress_callback(len(results), total, result)
 
     return results
 
@@ -255,67 +332,31 @@ def process_companies(
         categorization_result = categorize_company(company["company_name"])
 
         # Create result record with granular metrics
-        result = {
-            "company_name": company["company_name"],
-            "company_category": categorization_result["category"],
-            "category_id": categorization_result.get("category_id", 0),
-            "revenue": company["revenue"],
-            # Core metadata
-            "subsegment": categorization_result.get("subsegment", ""),
-            "confidence": categorization_result.get("confidence", ""),
-            "selected_company": categorization_result.get("selected_company", ""),
-            "org_number": categorization_result.get("org_number", ""),
-            # Granular confidence metrics
-            "categorized_by_naringskode": categorization_result.get(
-                "categorized_by_naringskode", 0
-            ),
-            "num_naringskoder": categorization_result.get("num_naringskoder", 0),
-            "exact_code_match": categorization_result.get("exact_code_match", 0),
-            "keyword_match": categorization_result.get("keyword_match", 0),
-            "confidence_score": categorization_result.get("confidence_score", 0.0),
-            "primary_naringskode": categorization_result.get("primary_naringskode", ""),
-            "matching_keywords": categorization_result.get("matching_keywords", ""),
-            "method": categorization_result.get("method", ""),
-        }
+        result = build_result_record(company, categorization_result)
 
         results.append(result)
 
-        # Progress output
-        print(
-            f"[{i:5}/{total}] {company['company_name']} -> {result['company_category']}"
-        )
-        if result["selected_company"] != company["company_name"]:
-            print(f"          [Selected: {result['selected_company']}]")
+        # Progress output, throttled like the concurrent path so terminal
+        # output doesn't dominate once categorizations are cache hits
+        if i % 100 == 0 or i <= 10:
+            print(
+                f"[{i:5}/{total}] {company['company_name']} -> {result['company_category']}"
+            )
+            if result["selected_company"] != company["company_name"]:
+                print(f"          [Selected: {result['selected_company']}]")
 
-        # Call progress callback if provided
+        # Call progress callback if provided (API rate limiting is handled
+        # per request by the api_client, so no fixed pauses are needed here)
         if progress_callback:
             progress_callback(i, total, result)
 
-        # Optimized rate limiting - less frequent for large datasets
-        if i % 50 == 0:  # Changed from 10 to 50 for better performance
-            print("          (Brief pause for API rate limiting...)")
-            time.sleep(0.5)  # Reduced from 1 second to 0.5 seconds
-
     return results
 
 
-def write_output_csv(
-    results, output_path, include_metadata=False, excel_compatible=True
-):
-    """
-    Write results to CSV file
-
-    Args:
-        results (list): List of result dictionaries
-        output_path (str): Path for output CSV file
-        include_metadata (bool): Whether to include additional metadata columns
-        excel_compatible (bool): Whether to optimize for Excel compatibility (adds BOM)
-    """
-    # Ensure output directory exists
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
+def get_output_fieldnames(include_metadata=False):
+    """Return the output CSV columns, optionally including all metadata"""
     if include_metadata:
-        fieldnames = [
+        return [
             "company_name",
             "company_category",
             "category_id",
@@ -334,147 +375,232 @@ def write_output_csv(
             "matching_keywords",
             "method",
         ]
-    else:
-        fieldnames = [
-            "company_name",
-            "company_category",
-            "category_id",
-            "revenue",
-            # Always include the key granular flags even in basic mode
-            "categorized_by_naringskode",
-            "confidence_score",
-        ]
+
+    return [
+        "company_name",
+        "company_category",
+        "category_id",
+        "revenue",
+        # Always include the key granular flags even in basic mode
+        "categorized_by_naringskode",
+        "confidence_score",
+    ]
+
+
+@contextmanager
+def open_output_writer(output_path, include_metadata=False, excel_compatible=True):
+    """
+    Create the output CSV with its header and keep it open for writing rows
+
+    Args:
+        output_path (str): Path for output CSV file
+        include_metadata (bool): Whether to include additional metadata columns
+        excel_compatible (bool): Whether to optimize for Excel compatibility (adds BOM)
+
+    Yields:
+        callable: Function taking a list of result dictionaries and writing
+            them, flushed to disk before it returns
+    """
+    # Ensure output directory exists (once per file; "." for bare file names)
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+
+    fieldnames = get_output_fieldnames(include_metadata)
 
     # Choose encoding based on Excel compatibility preference
     encoding = "utf-8-sig" if excel_compatible else "utf-8"
 
-    with open(output_path, "w", newline="", encoding=encoding) as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, delimiter=CSV_DELIMITER)
-        writer.writeheader()
+    with open(
+        output_path, "w", newline="", encoding=encoding, buffering=_IO_BUFFER_SIZE
+    ) as csvfile:
+        # Plain csv.writer with rows built in column order; avoids DictWriter
+        # re-resolving every fieldname per row
+        writer = csv.writer(csvfile, delimiter=CSV_DELIMITER)
+        writer.writerow(fieldnames)
+
+        def write_rows(results):
+            # Only write the specified fields; writerows loops over the rows in C
+            writer.writerows(
+                [result.get(field, "") for field in fieldnames] for result in results
+            )
+            # Hand each call's rows to the OS right away; the large buffer still
+            # batches the rows of a call, but nothing waits for the file to close
+            csvfile.flush()
+
+        yield write_rows
 
-        for result in results:
-            # Only write the specified fields
-            filtered_result = {field: result.get(field, "") for field in fieldnames}
-            writer.writerow(filtered_result)
 
+def print_output_saved(output_path, num_results, excel_compatible=True):
+    """Print where the output was saved and in which format"""
     print(f"\n✅ Results saved to: {output_path}")
-    print(f"   📊 Processed {len(results)} companies")
+    print(f"   📊 Processed {num_results} companies")
     if excel_compatible:
         print("   📋 Excel-compatible format (UTF-8 with BOM)")
     else:
         print("   🔤 Standard UTF-8 format")
 
 
-def generate_summary_report(results):
-    """Generate and print a detailed summary report with granular confidence metrics"""
-
-    # Category distribution
-    categories = {}
-    confidence_levels = {}
-
-    # Granular metrics
-    naringskode_categorized = 0
-    exact_code_matches = 0
-    keyword_matches = 0
-    avg_confidence_score = 0.0
-    method_distribution = {}
-
-    for result in results:
-        cat = result["company_category"]
-        categories[cat] = categories.get(cat, 0) + 1
-
-        conf = result.get("confidence", "Unknown")
-        confidence_levels[conf] = confidence_levels.get(conf, 0) + 1
-
-        # Count granular metrics
-        if result.get("categorized_by_naringskode", 0) == 1:
-            naringskode_categorized += 1
-
-        if result.get("exact_code_match", 0) == 1:
-            exact_code_matches += 1
+def write_output_csv(
+    results, output_path, include_metadata=False, excel_compatible=True
+):
+    """
+    Write results to CSV file
 
-        if result.get("keyword_match", 0) == 1:
-            keyword_matches += 1
+    Args:
+        results (list): List of result dictionaries
+        output_path (str): Path for output CSV file
+        include_metadata (bool): Whether to include additional metadata columns
+        excel_compatible (bool): Whether to optimize for Excel compatibility (adds BOM)
+    """
+    with open_output_writer(
+        output_path, include_metadata, excel_compatible
+    ) as write_rows:
+        write_rows(results)
+    print_output_saved(output_path, len(results), excel_compatible)
+
+
+class SummaryAccumulator:
+    """Running summary statistics, updated one result at a time"""
+
+    def __init__(self):
+        self.total_companies = 0
+        self.categories = {}
+        self.confidence_levels = {}
+
+        # Granular metrics
+        self.naringskode_categorized = 0
+        self.exact_code_matches = 0
+        self.keyword_matches = 0
+        self.confidence_score_total = 0.0
+        self.method_distribution = {}
+        self.quality_distribution = {"high": 0, "medium": 0, "low": 0}
+
+    def update(self, results):
+        """Add a list of result dictionaries to the running totals"""
+        categories = self.categories
+        confidence_levels = self.confidence_levels
+        method_distribution = self.method_distribution
+        quality = self.quality_distribution
 
-        # Accumulate confidence scores
-        conf_score = result.get("confidence_score", 0.0)
-        avg_confidence_score += conf_score
+        for result in results:
+            self.total_companies += 1
+
+            cat = result["company_category"]
+            categories[cat] = categories.get(cat, 0) + 1
+
+            conf = result.get("confidence", "Unknown")
+            confidence_levels[conf] = confidence_levels.get(conf, 0) + 1
+
+            # Count granular metrics
+            if result.get("categorized_by_naringskode", 0) == 1:
+                self.naringskode_categorized += 1
+
+            if result.get("exact_code_match", 0) == 1:
+                self.exact_code_matches += 1
+
+            if result.get("keyword_match", 0) == 1:
+                self.keyword_matches += 1
+
+            # Accumulate confidence scores and bucket them for the quality assessment
+            conf_score = result.get("confidence_score", 0.0)
+            self.confidence_score_total += conf_score
+            if conf_score >= 0.8:
+                quality["high"] += 1
+            elif conf_score >= 0.5:
+                quality["medium"] += 1
+            elif conf_score < 0.5:
+                quality["low"] += 1
+
+            # Method distribution
+            method = result.get("method", "unknown")
+            method_distribution[method] = method_distribution.get(method, 0) + 1
+
+    def finalize(self):
+        """Return the summary statistics dictionary"""
+        total_companies = self.total_companies
+        return {
+            "categories": self.categories,
+            "confidence_levels": self.confidence_levels,
+            "total_companies": total_companies,
+            "naringskode_categorized": self.naringskode_categorized,
+            "exact_code_matches": self.exact_code_matches,
+            "keyword_matches": self.keyword_matches,
+            "avg_confidence_score": (
+                self.confidence_score_total / total_companies
+                if total_companies > 0
+                else 0.0
+            ),
+            "method_distribution": self.method_distribution,
+            "quality_distribution": dict(self.quality_distribution),
+        }
 
-        # Method distribution
-        method = result.get("method", "unknown")
-        method_distribution[method] = method_distribution.get(method, 0) + 1
 
-    # Calculate averages
-    total_companies = len(results)
-    avg_confidence_score = (
-        avg_confidence_score / total_companies if total_companies > 0 else 0.0
-    )
+def generate_summary_report(results):
+    """Generate and print a detailed summary report with granular confidence metrics"""
+    summary = SummaryAccumulator()
+    summary.update(results)
+    return print_summary_report(summary.finalize())
+
+
+def _print_percentage_line(label, count, scale, total=None):
+    """Print one summary line as 'label: count (pct%)' ('count/total' if total given)"""
+    shown = f"{count}/{total}" if total is not None else count
+    print(f"   {label}: {shown} ({count * scale:.1f}%)")
+
+
+def print_summary_report(summary):
+    """Print a summary produced by SummaryAccumulator.finalize() and return it"""
+    categories = summary["categories"]
+    confidence_levels = summary["confidence_levels"]
+    total_companies = summary["total_companies"]
+    naringskode_categorized = summary["naringskode_categorized"]
+    exact_code_matches = summary["exact_code_matches"]
+    keyword_matches = summary["keyword_matches"]
+    avg_confidence_score = summary["avg_confidence_score"]
+    method_distribution = summary["method_distribution"]
+    high_quality = summary["quality_distribution"]["high"]
+    medium_quality = summary["quality_distribution"]["medium"]
+    low_quality = summary["quality_distribution"]["low"]
+
+    # Percentages share one scale factor (0 for an empty run, instead of
+    # dividing by zero)
+    scale = 100.0 / total_companies if total_companies else 0.0
 
     print(f"\n📈 Detailed Categorization Summary:")
     print("=" * 60)
 
     print("\n📋 Categories:")
-    for category, count in sorted(categories.items(), key=lambda x: x[1], reverse=True):
-        percentage = (count / len(results)) * 100
-        print(f"   {category}: {count} ({percentage:.1f}%)")
+    for category, count in sorted(categories.items(), key=itemgetter(1), reverse=True):
+        _print_percentage_line(category, count, scale)
 
     print(f"\n🎯 Confidence Levels:")
     for conf, count in sorted(confidence_levels.items()):
-        percentage = (count / len(results)) * 100
-        print(f"   {conf}: {count} ({percentage:.1f}%)")
+        _print_percentage_line(conf, count, scale)
 
     print(f"\n📊 Granular Confidence Metrics:")
-    print(
-        f"   📍 Categorized by Næringskode: {naringskode_categorized}/{total_companies} ({naringskode_categorized/total_companies*100:.1f}%)"
+    _print_percentage_line(
+        "📍 Categorized by Næringskode", naringskode_categorized, scale, total_companies
     )
-    print(
-        f"   🎯 Exact Code Matches: {exact_code_matches}/{total_companies} ({exact_code_matches/total_companies*100:.1f}%)"
+    _print_percentage_line(
+        "🎯 Exact Code Matches", exact_code_matches, scale, total_companies
     )
-    print(
-        f"   🔍 Keyword Matches: {keyword_matches}/{total_companies} ({keyword_matches/total_companies*100:.1f}%)"
+    _print_percentage_line(
+        "🔍 Keyword Matches", keyword_matches, scale, total_companies
     )
     print(f"   📈 Average Confidence Score: {avg_confidence_score:.3f}")
 
     print(f"\n🔧 Categorization Methods:")
     for method, count in sorted(
-        method_distribution.items(), key=lambda x: x[1], reverse=True
+        method_distribution.items(), key=itemgetter(1), reverse=True
     ):
-        percentage = (count / total_companies) * 100
-        print(f"   {method}: {count} ({percentage:.1f}%)")
+        _print_percentage_line(method, count, scale)
 
     # Quality assessment
-    high_quality = sum(1 for r in results if r.get("confidence_score", 0) >= 0.8)
-    medium_quality = sum(
-        1 for r in results if 0.5 <= r.get("confidence_score", 0) < 0.8
-    )
-    low_quality = sum(1 for r in results if r.get("confidence_score", 0) < 0.5)
-
     print(f"\n🌟 Quality Assessment:")
-    print(
-        f"   🟢 High Quality (≥0.8): {high_quality} ({high_quality/total_companies*100:.1f}%)"
-    )
-    print(
-        f"   🟡 Medium Quality (0.5-0.8): {medium_quality} ({medium_quality/total_companies*100:.1f}%)"
-    )
-    print(
-        f"   🔴 Low Quality (<0.5): {low_quality} ({low_quality/total_companies*100:.1f}%)"
-    )
+    _print_percentage_line("🟢 High Quality (≥0.8)", high_quality, scale)
+    _print_percentage_line("🟡 Medium Quality (0.5-0.8)", medium_quality, scale)
+    _print_percentage_line("🔴 Low Quality (<0.5)", low_quality, scale)
 
-    return {
-        "categories": categories,
-        "confidence_levels": confidence_levels,
-        "total_companies": len(results),
-        "naringskode_categorized": naringskode_categorized,
-        "exact_code_matches": exact_code_matches,
-        "keyword_matches": keyword_matches,
-        "avg_confidence_score": avg_confidence_score,
-        "method_distribution": method_distribution,
-        "quality_distribution": {
-            "high": high_quality,
-            "medium": medium_quality,
-            "low": low_quality,
-        },
-    }
+    return summary
 
 
 def process_csv_file(
@@ -485,6 +611,9 @@ def process_csv_file(
     concurrent=True,
     max_workers=5,
     batch_size=None,
+    use_cache=True,
+    rate_limit=None,
+    confirm_large=True,
 ):
     """
     Main function to process a CSV file from input to output
@@ -497,26 +626,41 @@ def process_csv_file(
         concurrent (bool): Whether to use concurrent processing for speed
         max_workers (int): Maximum number of concurrent workers
         batch_size (int): Batch size for very large datasets (auto-determined if None)
+        use_cache (bool): Reuse BRREG responses cached on disk and results
+            categorized by earlier runs in this process (duplicate names within
+            this run are still looked up once)
+        rate_limit (float): Maximum BRREG requests per second (config default if None)
+        confirm_large (bool): Ask on stdin before processing 10k+ companies;
+            pass False for unattended runs
 
     Returns:
         dict: Summary statistics
     """
+    # These settings are module-wide; restore them once this run is done
+    previous_use_cache = is_response_cache_enabled()
+    previous_rate_limit = get_rate_limit()
+    set_response_cache_enabled(use_cache)
+    if not use_cache:
+        clear_categorization_cache()
+    if rate_limit is not None:
+        set_rate_limit(rate_limit)
+
     try:
-        # Read input CSV
-        companies = read_input_csv(input_path)
+        # Count the input first; the rows themselves are streamed from disk
+        total = count_input_rows(input_path)
 
-        if not companies:
+        if not total:
             print("❌ No companies found in input file")
             return None
 
         # Show performance estimate for large datasets
-        if len(companies) >= 1000:
-            print_performance_summary(len(companies), concurrent, max_workers)
+        if total >= 1000:
+            print_performance_summary(total, concurrent, max_workers)
 
             # Ask for confirmation for very large datasets
-            if len(companies) >= 10000:
+            if confirm_large and total >= 10000:
                 response = input(
-                    f"\n⚠️  Processing {len(companies):,} companies will take significant time. Continue? (y/n): "
+                    f"\n⚠️  Processing {total:,} companies will take significant time. Continue? (y/n): "
                 )
                 if response.lower().strip() not in ["y", "yes"]:
                     print("❌ Processing cancelled by user")
@@ -528,28 +672,46 @@ def process_csv_file(
             input_name = Path(input_path).stem
             output_path = f"output/{input_name}_categorized_{timestamp}.csv"
 
-        # Process companies - use batch processing for very large datasets
-        if len(companies) >= 5000:  # Use batch processing for 5k+ companies
-            if batch_size is None:
-                batch_size = min(
-                    1000, len(companies) // 10
-                )  # Auto-determine batch size
-            results = process_companies_in_batches(
-                companies,
-                batch_size=batch_size,
-                concurrent=concurrent,
-                max_workers=max_workers,
-            )
-        else:
-            results = process_companies(
-                companies, concurrent=concurrent, max_workers=max_workers
-            )
-
-        # Write output CSV
-        write_output_csv(results, output_path, include_metadata, excel_compatible)
+        # Rows are written and summarized as soon as they are categorized, so
+        # results reach disk while later companies are still being fetched and
+        # batched runs don't need to keep every result in memory
+        summary = SummaryAccumulator()
+        with open_output_writer(
+            output_path, include_metadata, excel_compatible
+        ) as write_rows:
+
+            def emit_rows(rows):
+                write_rows(rows)
+                summary.update(rows)
+
+            companies = iter_input_csv(input_path, verbose=False)
+
+            # Process companies - use batch processing for very large datasets
+            if total >= 5000:  # Use batch processing for 5k+ companies
+                if batch_size is None:
+                    batch_size = min(1000, total // 10)  # Auto-determine batch size
+
+                # Only one batch of input rows is held in memory at a time
+                process_companies_in_batches(
+                    companies,
+                    total=total,
+                    batch_size=batch_size,
+                    concurrent=concurrent,
+                    max_workers=max_workers,
+                    batch_callback=emit_rows,
+                    keep_results=False,
+                )
+            else:
+                process_companies(
+                    list(companies),
+                    progress_callback=lambda i, total, result: emit_rows([result]),
+                    concurrent=concurrent,
+                    max_workers=max_workers,
+                )
+        print_output_saved(output_path, summary.total_companies, excel_compatible)
 
         # Generate summary
-        summary = generate_summary_report(results)
+        summary = print_summary_report(summary.finalize())
 
         return summary
 
@@ -557,6 +719,11 @@ def process_csv_file(
         print(f"❌ Error processing file: {e}")
         raise
 
+    finally:
+        set_response_cache_enabled(previous_use_cache)
+        if rate_limit is not None:
+            set_rate_limit(previous_rate_limit)
+
 
 def estimate_processing_time(num_companies, concurrent=True, max_workers=5):
     """Estimate processing time for large datasets"""
@@ -616,7 +783,11 @@ def print_performance_summary(num_companies, concurrent=True, max_workers=5):
 
     print(f"\n🔧 Current optimizations:")
     print(f"   • Company data caching (avoids duplicate API calls)")
-    print(f"   • Reduced rate limiting (pause every 50 instead of 10)")
+    rate_limit = get_rate_limit()
+    if rate_limit > 0:
+        print(
+            f"   • Shared API rate limit ({rate_limit:g} requests/s, cache hits free)"
+        )
     print(f"   • Concurrent processing with {max_workers} workers")
     print(f"   • Quiet mode (minimal output during processing)")
     print(f"   • Optimized confidence scoring")
@@ -625,33 +796,50 @@ def print_performance_summary(num_companies, concurrent=True, max_workers=5):
 
 
 def process_companies_in_batches(
-    companies, batch_size=1000, concurrent=True, max_workers=5, progress_callback=None
+    companies,
+    batch_size=1000,
+    concurrent=True,
+    max_workers=5,
+    progress_callback=None,
+    batch_callback=None,
+    keep_results=True,
+    total=None,
 ):
     """
     Process companies in batches to manage memory usage for very large datasets
 
     Args:
-        companies (list): List of company dictionaries
+        companies (iterable): Company dictionaries; may be a generator such as
+            iter_input_csv(), in which case only one batch is held at a time
         batch_size (int): Number of companies to process per batch
         concurrent (bool): Whether to use concurrent processing
         max_workers (int): Maximum number of concurrent workers
         progress_callback (callable): Optional callback for progress updates
+        batch_callback (callable): Optional callback receiving each batch's
+            results as soon as the batch completes (e.g. to write them out)
+        keep_results (bool): Collect all results for the return value; turn off
+            when batch_callback consumes them, so memory stays at one batch
+        total (int): Number of companies (required when companies has no len())
 
     Returns:
-        list: List of processed company dictionaries with categories
+        list: List of processed company dictionaries with categories (empty
+            if keep_results is False)
     """
-    total = len(companies)
+    if total is None:
+        total = len(companies)
+    rows = iter(companies)
+    total_batches = (total + batch_size - 1) // batch_size
     all_results = []
+    processed = 0
 
     print(f"\n🔄 Processing {total:,} companies in batches of {batch_size:,}...")
     print("=" * 60)
 
-    # Process in batches
-    for i in range(0, total, batch_size):
-        batch_end = min(i + batch_size, total)
-        batch = companies[i:batch_end]
-        batch_num = (i // batch_size) + 1
-        total_batches = (total + batch_size - 1) // batch_size
+    # Process in batches, pulling each one from the input as it's needed
+    for batch_num in range(1, total_batches + 1):
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            break
 
         print(
             f"\n📦 Processing batch {batch_num}/{total_batches} ({len(batch)} companies)..."
@@ -665,16 +853,21 @@ def process_companies_in_batches(
             progress_callback=None,  # We'll handle progress at batch level
         )
 
-        all_results.extend(batch_results)
+        processed += len(batch_results)
+        if keep_results:
+            all_results.extend(batch_results)
+
+        if batch_callback:
+            batch_callback(batch_results)
 
         print(
-            f"✅ Completed batch {batch_num}/{total_batches} - {len(all_results):,}/{total:,} companies processed"
+            f"✅ Completed batch {batch_num}/{total_batches} - {processed:,}/{total:,} companies processed"
         )
 
         # Call progress callback if provided
         if progress_callback:
             for result in batch_results:
-                progress_callback(len(all_results), total, result)
+                progress_callback(processed, total, result)
 
     print(f"\n🎉 All {total:,} companies processed successfully!")
     return all_results
@@ -7,46 +7,41 @@ and other helper functions used throughout the categorization system.
 
 from difflib import SequenceMatcher
 
+# BRREG reports up to three næringskoder per company under these keys
+_NK_KEYS = ("naeringskode1", "naeringskode2", "naeringskode3")
+
+# Any of these fields being set means the company is no longer active
+_INACTIVE_KEYS = (
+    "konkurs",  # Bankruptcy
+    "underAvvikling",  # Under liquidation
+    "underTvangsavviklingEllerTvangsopplosning",  # Forced liquidation
+    "nedleggelsesdato",  # Closure date
+)
+
 
 def similarity_score(str1, str2):
     """Calculate similarity score between two strings"""
     return SequenceMatcher(None, str1.lower(), str2.lower()).ratio()
 
 
+def normalize_company_name(company_name):
+    """Normalize company name for BRREG search keys (lowercase, collapsed whitespace)"""
+    return " ".join(company_name.lower().split())
+
+
 def has_naringskoder(company_data):
     """Check if company has any næringskoder"""
-    for i in range(1, 4):
-        nk = company_data.get(f"naeringskode{i}")
-        if nk and nk.get("kode"):
-            return True
-    return False
+    return any((company_data.get(key) or {}).get("kode") for key in _NK_KEYS)
 
 
 def is_company_active(company_data):
     """Check if company appears to be active"""
-    # Check for inactive indicators
-    if company_data.get("konkurs"):  # Bankruptcy
-        return False
-    if company_data.get("underAvvikling"):  # Under liquidation
-        return False
-    if company_data.get(
-        "underTvangsavviklingEllerTvangsopplosning"
-    ):  # Forced liquidation
-        return False
-    if company_data.get("nedleggelsesdato"):  # Closure date
-        return False
-
-    return True
+    return not any(company_data.get(key) for key in _INACTIVE_KEYS)
 
 
 def extract_naringskoder(company_data):
     """Extract all næringskoder from company data"""
-    naringskoder = []
-    for i in range(1, 4):
-        nk = company_data.get(f"naeringskode{i}")
-        if nk:
-            naringskoder.append(nk)
-    return naringskoder
+    return [nk for key in _NK_KEYS if (nk := company_data.get(key))]
 
 
 def format_naringskoder(naringskoder):
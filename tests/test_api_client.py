@@ -0,0 +1,64 @@
+"""
+Tests for the BRREG API client's on-disk response cache
+
+Run from the repository root with: python -m unittest discover tests
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src import api_client
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        cache_path = os.path.join(self.tmpdir.name, "brreg.sqlite")
+        patches = [
+            mock.patch.object(api_client, "RESPONSE_CACHE_PATH", cache_path),
+            mock.patch.object(api_client, "_response_cache", None),
+            mock.patch.object(api_client, "_response_cache_enabled", True),
+            mock.patch.object(api_client, "_response_cache_failed", False),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def tearDown(self):
+        if api_client._response_cache is not None:
+            api_client._response_cache.close()
+
+    def test_corrupt_row_is_refetched_and_overwritten(self):
+        cache = api_client._get_response_cache()
+        cache.execute(
+            "INSERT INTO responses VALUES (?, ?, ?, ?)",
+            ("acme", 10, time.time(), "{trunc"),
+        )
+        cache.commit()
+
+        companies = [{"navn": "ACME AS", "organisasjonsnummer": "123456789"}]
+        with mock.patch.object(
+            api_client, "_request_companies", return_value=companies
+        ) as request:
+            with self.assertLogs(api_client.logger, level="WARNING"):
+                self.assertEqual(api_client.fetch_many(["ACME"]), [companies])
+            request.assert_called_once()
+
+        # The corrupt payload was replaced by the fresh response
+        payload = cache.execute(
+            "SELECT payload FROM responses WHERE name = ? AND size = ?", ("acme", 10)
+        ).fetchone()[0]
+        self.assertEqual(json.loads(payload), companies)
+
+
+if __name__ == "__main__":
+    unittest.main()